@@ -7,8 +7,6 @@ import argparse
 import sys
 from datetime import datetime
 
-from .xtract import xtract_main
-from .ledgerfy import ledgerfy_main
 from . import __version__
 from platformdirs import user_data_dir
 from pathlib import Path
@@ -63,6 +61,12 @@ Examples:
     xtract_parser.add_argument(
         "-s", "--summary", action="store_true", help="Show conversion summary"
     )
+    xtract_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Worker processes for reading long statements (default: one per CPU)",
+    )
 
     # Add ledgerfy subcommand
     ledgerfy_parser = subparsers.add_parser(
@@ -88,6 +92,12 @@ Examples:
     ledgerfy_parser.add_argument(
         "-e", "--end-date", help="End date for processing transactions (YYYY-MM-DD)"
     )
+    ledgerfy_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Worker processes for reading very large CSV files (default: one per CPU)",
+    )
 
     args = parser.parse_args()
 
@@ -95,9 +105,15 @@ Examples:
         parser.print_help()
         return 1
 
+    # Subcommand modules pull in pandas and pdfplumber, so they are only
+    # imported for the command that runs
     if args.command == "xtract":
+        from .xtract import xtract_main
+
         return xtract_main(args)
     elif args.command == "ledgerfy":
+        from .ledgerfy import ledgerfy_main
+
         return ledgerfy_main(args)
 
     return 0
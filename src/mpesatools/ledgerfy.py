@@ -3,15 +3,121 @@
 Ledger conversion module for mpesa-tools
 """
 
+import ast
+import codecs
 import csv
+import io
 import json
-import sys
-from collections import defaultdict
-from datetime import datetime
+import multiprocessing
+import operator
+import os
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
 from pathlib import Path
-from platformdirs import user_data_dir
 import shutil
 
+from .utils import get_default_output_path
+
+try:
+    import ahocorasick
+except ImportError:  # no cov
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:  # no cov
+    hyperscan = None  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # no cov
+    orjson = None  # type: ignore[assignment]
+
+# Rule precompiled by compile_rules for the categorization loop; condition
+# is None or a callable taking the amount
+CRule = namedtuple("CRule", "keywords exclude condition match_all account_id")
+
+# Categorized transaction, ordered by timestamp first. account_id indexes
+# config["_accounts"]; posting is the signed ledger amount, negative for
+# deposits (income)
+Tx = namedtuple("Tx", "timestamp account_id posting details balance")
+
+
+class InputError(ValueError):
+    """The input statement could not be read"""
+
+
+# Comparisons of the form "amount OP number", mapped to the operator that
+# takes the number first, so partial(op, number)(amount) runs in C
+_FLIPPED_COMPARISONS = {
+    ast.Gt: operator.lt,
+    ast.GtE: operator.le,
+    ast.Lt: operator.gt,
+    ast.LtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_COMPARISONS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+# Input columns used for the ledger
+_COLUMNS = [
+    "Completion Time",
+    "Details",
+    "Transaction Status",
+    "Paid In",
+    "Withdrawn",
+    "Balance",
+]
+
+# Sort key for Tx records; sorting on the timestamp alone keeps
+# same-time transactions in input order
+_by_timestamp = operator.attrgetter("timestamp")
+
+
+# CSV statements at least this large are read column-wise with pandas;
+# below this the pandas import costs more than the column-wise parse saves
+_PANDAS_MIN_BYTES = 64 << 20
+
+# CSV statements at least this large are read by a pool of worker processes
+_PARALLEL_MIN_BYTES = 64 << 20
+
+# Buffer size for writing the ledger file
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Globals for evaluating rule conditions: no builtins beyond basic math
+_SAFE_GLOBALS = {
+    "__builtins__": {},
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+}
+
+# Names a rule condition may refer to
+_CONDITION_NAMES = frozenset(_SAFE_GLOBALS) - {"__builtins__"} | {"amount"}
+
+# Expressions a rule condition may not use, as these can reach objects
+# other than the amount and the functions in _SAFE_GLOBALS
+_DISALLOWED_NODES = {
+    ast.Attribute: "attribute access",
+    ast.Subscript: "subscripting",
+    ast.Lambda: "lambda",
+    ast.NamedExpr: "assignment expression",
+    ast.ListComp: "comprehension",
+    ast.SetComp: "comprehension",
+    ast.DictComp: "comprehension",
+    ast.GeneratorExp: "comprehension",
+}
+
 
 def load_config(config_path):
     """
@@ -31,6 +137,7 @@ def load_config(config_path):
         config = json.load(file)
 
     validate_config(config)
+    compile_rules(config)
 
     return config
 
@@ -85,23 +192,221 @@ def validate_config(config):
                     f"Rule {i} has invalid match_type '{match_type}'. Must be 'any' or 'all'."
                 )
 
+        # Validate condition if present
+        if "condition" in rule and not isinstance(rule["condition"], (str, type(None))):
+            raise ValueError(f"Rule {i} condition must be a string")
+
     print(
         f"Configuration validated: {len(config['accounts'])} accounts, {len(config['rules'])} rules"
     )
 
 
-def check_keywords_match(details_lower, keywords, match_type="any", exclude=None):
+def _number(node):
+    """Return the number a literal AST node stands for, or None"""
+    try:
+        value = ast.literal_eval(node)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _compile_condition(condition, filename):
+    """
+    Compile a rule condition into a callable taking the amount
+
+    Simple comparisons such as "amount > 1000" or "500 <= amount" become
+    a C-level operator call; anything else is evaluated from a compiled
+    code object with _SAFE_GLOBALS.
+
+    Raises:
+        SyntaxError: If the condition is not a valid expression
+        ValueError: If the condition uses a name other than amount or the
+            functions in _SAFE_GLOBALS, or any of _DISALLOWED_NODES
+    """
+    tree = ast.parse(condition, filename, mode="eval")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in _CONDITION_NAMES:
+            problem = f"unknown name '{node.id}'"
+        elif type(node) in _DISALLOWED_NODES:
+            problem = f"{_DISALLOWED_NODES[type(node)]} is not allowed"
+        else:
+            continue
+        raise ValueError(
+            f"{problem}, conditions may only use " + ", ".join(sorted(_CONDITION_NAMES))
+        )
+    body = tree.body
+
+    if isinstance(body, ast.Compare) and len(body.ops) == 1:
+        op = type(body.ops[0])
+        left, right = body.left, body.comparators[0]
+        if op in _COMPARISONS:
+            if isinstance(left, ast.Name) and left.id == "amount":
+                threshold = _number(right)
+                if threshold is not None:
+                    return partial(_FLIPPED_COMPARISONS[op], threshold)
+            if isinstance(right, ast.Name) and right.id == "amount":
+                threshold = _number(left)
+                if threshold is not None:
+                    return partial(_COMPARISONS[op], threshold)
+
+    code = compile(tree, filename, "eval")
+
+    def evaluate(amount):
+        return eval(code, _SAFE_GLOBALS, {"amount": amount})
+
+    return evaluate
+
+
+def compile_rules(config):
+    """
+    Precompile the validated rules for fast categorization
+
+    Attaches the compiled rules as config["_compiled_rules"], the keyword
+    matcher as config["_matcher"] and an index of the rules using each
+    keyword as config["_keyword_rules"]. Accounts are interned as ids into
+    config["_accounts"], with their padded ledger column in
+    config["_accounts_padded"]. Conditions are compiled here (see
+    _compile_condition) so syntax errors are reported once, at load time.
     """
-    Check if keywords match based on match_type (AND/OR logic)
+    config["_accounts"] = tuple(config["accounts"])
+    config["_accounts_padded"] = tuple(
+        f"{account:<45}" for account in config["_accounts"]
+    )
+    account_to_id = {account: i for i, account in enumerate(config["_accounts"])}
+    config["_account_to_id"] = account_to_id
+    config["_default_account_id"] = account_to_id[config["default_account"]]
+
+    compiled_rules = []
+    keyword_rules = defaultdict(list)
+    for i, rule in enumerate(config["rules"]):
+        condition = rule.get("condition") or None
+        if condition is not None:
+            try:
+                condition = _compile_condition(condition, f"<rule {i}>")
+            except SyntaxError as e:
+                raise ValueError(
+                    f"Rule {i} has invalid condition '{rule['condition']}': {e.msg}"
+                )
+            except ValueError as e:
+                raise ValueError(
+                    f"Rule {i} has invalid condition '{rule['condition']}': {e}"
+                )
+
+        for keyword in set(rule["keywords"]):
+            keyword_rules[keyword].append(i)
+
+        compiled_rules.append(
+            CRule(
+                keywords=tuple(rule["keywords"]),
+                exclude=tuple(rule.get("exclude") or ()),
+                condition=condition,
+                match_all=rule.get("match_type") == "all",
+                account_id=account_to_id[rule["account"]],
+            )
+        )
+
+    config["_compiled_rules"] = compiled_rules
+    config["_keyword_rules"] = {
+        keyword: tuple(rules) for keyword, rules in keyword_rules.items()
+    }
+    config["_matcher"] = build_rule_matcher(config)
+
+
+def build_rule_matcher(config):
+    """
+    Build a multi-pattern matcher over every keyword and exclude term in the rules
+
+    Each transaction is scanned once, regardless of the number of rules,
+    using an Aho-Corasick automaton (pyahocorasick) when available, else
+    Hyperscan's literal matcher, else a plain scan of each unique term.
+
+    Returns:
+        callable: Maps lowercase details to the set of terms found in them
+    """
+    terms = {
+        term
+        for rule in config["rules"]
+        for field in ("keywords", "exclude")
+        for term in rule.get(field) or []
+    }
+    # The empty string is a substring of everything but cannot be added
+    # to the automaton
+    always = {""} & terms
+    words = tuple(terms - always)
+
+    if not words:
+        return lambda details_lower: set(always)
+
+    # pyahocorasick first: on short details strings Hyperscan's per-match
+    # Python callback costs more than the automaton walk
+    if ahocorasick is not None:
+        return _ahocorasick_matcher(words, always)
+
+    if hyperscan is not None:
+        return _hyperscan_matcher(words, always)
+
+    def match(details_lower):
+        return always | {term for term in words if term in details_lower}
+
+    return match
+
+
+def _hyperscan_matcher(words, always):
+    """Match words with a Hyperscan literal database, see build_rule_matcher"""
+    # Matching UTF-8 bytes finds exactly the same substrings as str matching
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[word.encode("utf-8") for word in words],
+        ids=list(range(len(words))),
+        elements=len(words),
+        flags=hyperscan.HS_FLAG_SINGLEMATCH,
+        literal=True,
+    )
+
+    def on_match(word_id, start, end, flags, hits):
+        hits.add(words[word_id])
+
+    def match(details_lower):
+        hits = set(always)
+        database.scan(
+            details_lower.encode("utf-8"), match_event_handler=on_match, context=hits
+        )
+        return hits
+
+    return match
+
+
+def _ahocorasick_matcher(words, always):
+    """Match words with an Aho-Corasick automaton, see build_rule_matcher"""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+
+    def match(details_lower):
+        hits = set(always)
+        for _, word in automaton.iter(details_lower):
+            hits.add(word)
+        return hits
+
+    return match
+
+
+def check_keywords_match(details_lower, keywords, match_all=False, exclude=None):
+    """
+    Check if keywords match using AND/OR logic
 
     Args:
-        details_lower: Transaction details in lowercase
+        details_lower: Transaction details in lowercase, or the set of
+            terms found in them by build_rule_matcher
         keywords: List of keywords to check
-        match_type: "any" (OR logic, default) or "all" (AND logic)
+        match_all: True for AND logic (match_type "all"), False for OR logic
         exclude: List of exclude keywords
 
     Returns:
-        bool: True if keywords match according to match_type
+        bool: True if keywords match
     """
     if not keywords:
         return False
@@ -111,7 +416,7 @@ def check_keywords_match(details_lower, keywords, match_type="any", exclude=None
         return False
 
     # Check keywords based on match_type
-    if match_type == "all":
+    if match_all:
         # AND logic: all keywords must be present
         return all(keyword in details_lower for keyword in keywords)
     else:
@@ -119,163 +424,465 @@ def check_keywords_match(details_lower, keywords, match_type="any", exclude=None
         return any(keyword in details_lower for keyword in keywords)
 
 
-def categorize_transaction(details, amount, config):
+def categorize_transaction(details_lower, amount, config):
     """
     Categorize transaction based on configuration
+
+    Args:
+        details_lower: Transaction details in lowercase
+        amount: Transaction amount
+        config: Configuration returned by load_config
+
+    Returns:
+        int: Account id, an index into config["_accounts"]
     """
-    details_lower = details.lower()
+    # Find all rule terms in a single pass
+    hits = config["_matcher"](details_lower)
+
+    # Only rules with at least one keyword present can match
+    keyword_rules = config["_keyword_rules"]
+    candidates = {i for term in hits for i in keyword_rules.get(term, ())}
 
-    # Check each rule in order
-    for rule in config["rules"]:
-        keywords = rule.get("keywords", [])
-        exclude = rule.get("exclude", [])
-        condition = rule.get("condition")
-        match_type = rule.get("match_type", "any")  # Default to "any" (OR logic)
+    # Check candidate rules in declaration order
+    compiled_rules = config["_compiled_rules"]
+    for i in sorted(candidates):
+        rule = compiled_rules[i]
 
         # Check if keywords match based on match_type
-        if not check_keywords_match(details_lower, keywords, match_type, exclude):
+        if not check_keywords_match(hits, rule.keywords, rule.match_all, rule.exclude):
             continue
 
         # If there's a condition, check it
-        if condition:
+        if rule.condition is not None:
             try:
-                if eval(condition, {"amount": amount}):
-                    return rule["account"]
+                if rule.condition(amount):
+                    return rule.account_id
             except Exception:
                 # If condition evaluation fails, continue to next rule
                 continue
         else:
             # No condition, return the account
-            return rule["account"]
+            return rule.account_id
 
     # Return default account if no rule matches
-    return config["default_account"]
+    return config["_default_account_id"]
 
 
-def parse_mpesa_to_ledger_with_balance(
-    input_file_path, output_file_path, start_date, end_date, config_path
-):
+def _by_date(transaction):
+    """Group key for Tx records: the YYYY-MM-DD date of the timestamp"""
+    return transaction.timestamp[:10]
+
+
+def _check_columns(columns):
+    """Raise ValueError if any of _COLUMNS is missing from the input"""
+    missing = [column for column in _COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Input file is missing column(s): {', '.join(missing)}")
+
+
+def _iter_csv_rows(input_file_path):
     """
-    Enhanced version with daily ending balance using config file
+    Lazily read an M-Pesa CSV file with csv.reader
+
+    Yields:
+        tuple: Column values in _COLUMNS order for each transaction
     """
-    # Load configuration (with validation)
-    config = load_config(config_path)
+    # utf-8-sig drops the byte order mark some spreadsheet exports add
+    with open(input_file_path, "r", newline="", encoding="utf-8-sig") as input_file:
+        reader = csv.reader(input_file)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        _check_columns(header)
+        get_columns = operator.itemgetter(
+            *(header.index(column) for column in _COLUMNS)
+        )
 
-    transactions_by_date = defaultdict(list)
-    with open(input_file_path, "r") as input_file:
         try:
-            transactions = json.load(input_file)
-        except json.JSONDecodeError:
-            input_file.seek(0)
-            content = input_file.read()
-            content = content.lstrip("\ufeff")
+            for row in reader:
+                if row:
+                    yield get_columns(row)
+        except IndexError:
+            raise ValueError(
+                f"Input file line {reader.line_num} has fewer columns than the header"
+            )
 
-            reader = csv.DictReader(content.splitlines())
-            transactions = list(reader)
 
-    for row in transactions:
-        completion_time = row["Completion Time"]
-        transaction_date = completion_time.split(" ")[0]
+def _read_json(input_file_path):
+    """
+    Read an M-Pesa JSON file as written by xtract
 
+    Returns:
+        list: Column values in _COLUMNS order for each transaction
+    """
+    with open(input_file_path, "rb") as input_file:
+        data = input_file.read()
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8) :]
+    if not data.strip():
+        return []
+    records = orjson.loads(data) if orjson is not None else json.loads(data)
+    if not isinstance(records, list):
+        raise ValueError("Input file must hold a list of transactions")
+    if not records:
+        return []
+
+    _check_columns(records[0])
+    get_columns = operator.itemgetter(*_COLUMNS)
+    try:
+        return [
+            tuple("" if value is None else str(value) for value in get_columns(record))
+            for record in records
+        ]
+    except KeyError as e:
+        raise ValueError(f"Input file is missing column(s): {e.args[0]}")
+
+
+def _categorize_rows(rows, start_date, end_date, config):
+    """
+    Filter and categorize rows from _iter_csv_rows or _read_json, keeping
+    completed transactions within the date range
+
+    Returns:
+        list: Tx records in input order
+    """
+    categorized = []
+    for completion_time, details, status, paid_in, withdrawn, balance in rows:
+        # Completion Time starts with an ISO YYYY-MM-DD date
+        transaction_date = completion_time[:10]
         if transaction_date < start_date:
             continue
 
         if end_date and transaction_date > end_date:
             continue
 
-        details = row["Details"]
-        status = row["Transaction Status"]
-        paid_in = row["Paid In"]
-        withdrawn = row["Withdrawn"]
-        balance = row["Balance"]
+        if status.lower() != "completed":
+            continue
 
-        # Use ternary operator and convert to float only once
         paid_in = float(paid_in) if paid_in else 0.0
         withdrawn = float(withdrawn) if withdrawn else 0.0
         balance = float(balance) if balance else 0.0
 
-        if status.lower() != "completed":
-            continue
+        # Deposits have a Paid In amount; everything else is a withdrawal
+        if paid_in > 0:
+            amount, posting = paid_in, -paid_in
+        else:
+            amount = posting = withdrawn
+
+        account_id = categorize_transaction(details.lower(), amount, config)
+        categorized.append(Tx(completion_time, account_id, posting, details, balance))
+
+    return categorized
+
+
+def _to_amount(column):
+    """Convert a column of amount strings to float64, empty meaning 0.0"""
+    return column.mask(column == "", "0").astype("float64")
+
+
+def _filter_transactions(frame, start_date, end_date):
+    """
+    Keep completed transactions within the date range, like _categorize_rows
+
+    Returns:
+        DataFrame: timestamp, details, details_lower, paid_in, withdrawn
+        and balance columns
+    """
+    import pandas as pd
+
+    # Completion Time starts with an ISO YYYY-MM-DD date
+    dates = frame["Completion Time"].str.slice(0, 10)
+
+    mask = dates >= start_date
+    if end_date:
+        mask &= dates <= end_date
+    frame = frame[mask]
+
+    # Check the status, in any casing, only on rows inside the date range
+    frame = frame[frame["Transaction Status"].str.lower() == "completed"]
+    return pd.DataFrame(
+        {
+            "timestamp": frame["Completion Time"],
+            "details": frame["Details"],
+            "details_lower": frame["Details"].str.lower(),
+            "paid_in": _to_amount(frame["Paid In"]),
+            "withdrawn": _to_amount(frame["Withdrawn"]),
+            "balance": _to_amount(frame["Balance"]),
+        }
+    )
+
+
+def _parse_csv(source):
+    """
+    Parse the ledger columns of an M-Pesa CSV file or buffer as strings,
+    with the pyarrow CSV engine when pyarrow is installed
+    """
+    import pandas as pd
+
+    try:
+        import pyarrow  # noqa: F401
+
+        engine = "pyarrow"
+    except ImportError:  # no cov
+        engine = "c"
+
+    # utf-8-sig drops the byte order mark some spreadsheet exports add
+    return pd.read_csv(
+        source,
+        usecols=_COLUMNS,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        engine=engine,
+    )
+
+
+def _read_csv_fast(input_file_path, start_date, end_date):
+    """
+    Read a large M-Pesa CSV file column-wise with pandas
+
+    Only pays off from _PANDAS_MIN_BYTES on; smaller files are read with
+    _iter_csv_rows.
+    """
+    import pandas as pd
+
+    with open(input_file_path, "r", newline="", encoding="utf-8-sig") as input_file:
+        reader = csv.reader(input_file)
+        header = next(reader, None)
+        if header is not None:
+            _check_columns(header)
+        # pyarrow cannot parse a header-only file without a trailing newline
+        has_rows = any(reader)
+
+    if has_rows:
+        frame = _parse_csv(input_file_path)
+    else:
+        frame = pd.DataFrame(columns=_COLUMNS, dtype=str)
+
+    return _filter_transactions(frame, start_date, end_date)
+
+
+def _is_json_file(input_file_path):
+    """
+    Tell JSON from CSV input by the .json/.csv extension, or otherwise by
+    the first non-whitespace character of the file
+    """
+    suffix = Path(input_file_path).suffix.lower()
+    if suffix in (".json", ".csv"):
+        return suffix == ".json"
+
+    with open(input_file_path, "r", encoding="utf-8-sig") as input_file:
+        while True:
+            chunk = input_file.read(64)
+            head = chunk.lstrip()
+            if head or not chunk:
+                return head[:1] in ("{", "[")
+
+
+def _categorize(transactions, config):
+    """
+    Categorize transactions returned by _filter_transactions
+
+    Returns:
+        list: Tx records in input order
+    """
+    import numpy as np
+
+    paid_in = transactions["paid_in"].to_numpy(dtype=np.float64)
+    withdrawn = transactions["withdrawn"].to_numpy(dtype=np.float64)
+
+    # Deposits have a Paid In amount; everything else is a withdrawal
+    is_deposits = paid_in > 0
+    amounts = np.where(is_deposits, paid_in, withdrawn)
+    postings = np.where(is_deposits, -amounts, amounts)
+
+    categorized = []
+    for (
+        completion_time,
+        details,
+        details_lower,
+        balance,
+        amount,
+        posting,
+    ) in zip(
+        transactions["timestamp"].tolist(),
+        transactions["details"].tolist(),
+        transactions["details_lower"].tolist(),
+        transactions["balance"].tolist(),
+        amounts.tolist(),
+        postings.tolist(),
+    ):
+        account_id = categorize_transaction(details_lower, amount, config)
+        categorized.append(Tx(completion_time, account_id, posting, details, balance))
+
+    return categorized
+
+
+# Configuration used by _process_csv_chunk in worker processes
+_worker_config = None
+
+
+def _init_worker(config):
+    """Compile the rules once per worker process"""
+    global _worker_config
+    compile_rules(config)
+    _worker_config = config
+
+
+def _process_csv_chunk(input_file_path, start, end, header_line, start_date, end_date):
+    """Read, filter and categorize the CSV records in a byte range"""
+    with open(input_file_path, "rb") as input_file:
+        input_file.seek(start)
+        data = input_file.read(end - start)
+
+    frame = _parse_csv(io.BytesIO(header_line + data))
+    transactions = _filter_transactions(frame, start_date, end_date)
+    return _categorize(transactions, _worker_config)
+
+
+def _parallel_csv_iter(
+    input_file_path, config, start_date, end_date, workers, chunk_bytes=8 << 20
+):
+    """
+    Read, filter and categorize a large CSV file in worker processes
+
+    The file is split into byte ranges of about chunk_bytes that end on a
+    newline, so records must not contain embedded newlines (xtract never
+    writes any). At most two ranges per worker are queued at a time.
+
+    Yields:
+        Tx: Categorized transactions in file order
+    """
+    # Workers compile their own rules; the compiled ones do not pickle
+    raw_config = {
+        key: value for key, value in config.items() if not key.startswith("_")
+    }
+
+    with open(input_file_path, "rb") as input_file:
+        header_line = input_file.readline()
+        _check_columns(next(csv.reader([header_line.decode("utf-8-sig")]), []))
+        size = os.fstat(input_file.fileno()).st_size
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(raw_config,),
+        ) as executor:
+            pending = deque()
+            start = input_file.tell()
+            while start < size:
+                # Extend the range to the end of the line it stops in
+                input_file.seek(min(start + chunk_bytes, size))
+                input_file.readline()
+                end = input_file.tell()
+
+                pending.append(
+                    executor.submit(
+                        _process_csv_chunk,
+                        input_file_path,
+                        start,
+                        end,
+                        header_line,
+                        start_date,
+                        end_date,
+                    )
+                )
+                start = end
+
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+
+
+def parse_mpesa_to_ledger_with_balance(
+    input_file_path, output_file_path, start_date, end_date, config_path, workers=1
+):
+    """
+    Enhanced version with daily ending balance using config file
+
+    With workers > 1, very large CSV files are read by that many worker
+    processes. Callers doing so from a script must guard their entry point
+    with if __name__ == "__main__".
+
+    Raises:
+        InputError: If the input file cannot be read
+        ValueError: If the configuration is invalid
+    """
+    # Load configuration (with validation)
+    config = load_config(config_path)
+
+    # Decide the input format once; sniffing may have to open the file
+    try:
+        if _is_json_file(input_file_path):
+            transactions = _categorize_rows(
+                _read_json(input_file_path), start_date, end_date, config
+            )
+        else:
+            size = os.path.getsize(input_file_path)
+            if workers > 1 and size >= _PARALLEL_MIN_BYTES:
+                transactions = list(
+                    _parallel_csv_iter(
+                        input_file_path, config, start_date, end_date, workers
+                    )
+                )
+            elif size >= _PANDAS_MIN_BYTES:
+                transactions = _categorize(
+                    _read_csv_fast(input_file_path, start_date, end_date), config
+                )
+            else:
+                transactions = _categorize_rows(
+                    _iter_csv_rows(input_file_path), start_date, end_date, config
+                )
+    except (ValueError, csv.Error) as e:
+        raise InputError(str(e)) from e
 
-        is_deposit = paid_in > 0 if paid_in else False
-        amount = paid_in if is_deposit else withdrawn
-        account = categorize_transaction(details, amount, config)
-
-        transactions_by_date[transaction_date].append(
-            {
-                "account": account,
-                "amount": amount,
-                "details": details,
-                "balance": balance,
-                "timestamp": completion_time,
-                "is_deposit": is_deposit,
-            }
-        )
     # Check if we have any transactions in the date range
-    if not transactions_by_date:
+    if not transactions:
         print(
             f"No transactions found in the date range: {start_date} to {end_date or 'end of data'}"
         )
         return
 
-    # Write ledger file with daily ending balance
-    with open(output_file_path, "w", encoding="utf-8") as ledger_file:
-        for date in sorted(transactions_by_date.keys()):
-            ledger_file.write(f"{date} *\n")
-            ledger_file.write("    Assets:Checking:Mpesa\n")
+    # Write ledger file with daily ending balance, one write per day
+    accounts_padded = config["_accounts_padded"]
+    with open(
+        output_file_path, "w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE
+    ) as ledger_file:
+        # One sort by timestamp orders both the days and each day's
+        # transactions
+        transactions.sort(key=_by_timestamp)
+        for date, daily_transactions in groupby(transactions, key=_by_date):
+            lines = [f"{date} *\n", "    Assets:Checking:Mpesa\n"]
+
+            *head, last = daily_transactions
+            for transaction in head:
+                lines.append(
+                    f"    {accounts_padded[transaction.account_id]} {transaction.posting:15.2f} KES ; {transaction.details}\n"
+                )
 
-            # Sort transactions by timestamp to get the correct order
-            daily_transactions = sorted(
-                transactions_by_date[date], key=lambda x: x["timestamp"]
+            # The last transaction of the day includes the balance
+            lines.append(
+                f"    {accounts_padded[last.account_id]} {last.posting:15.2f} KES ; {last.details} BAL KES {last.balance:.2f}\n"
             )
 
-            for i, transaction in enumerate(daily_transactions):
-                account = transaction["account"]
-                amount = transaction["amount"]
-                is_deposit = transaction["is_deposit"]
-                details = transaction["details"]
-                balance = transaction["balance"]
-
-                if is_deposit:
-                    formatted_amount = f"{-amount:15.2f} KES"  # Negative for income
-                else:
-                    formatted_amount = f"{amount:15.2f} KES"
-
-                # Truncate details if too long
-                truncated_details = details
-
-                # For the last transaction of the day, include balance
-                if i == len(daily_transactions) - 1:
-                    ledger_file.write(
-                        f"    {account:<45} {formatted_amount} ; {truncated_details} BAL KES {balance:.2f}\n"
-                    )
-                else:
-                    ledger_file.write(
-                        f"    {account:<45} {formatted_amount} ; {truncated_details}\n"
-                    )
-
-            ledger_file.write("\n")
+            lines.append("\n")
+            ledger_file.write("".join(lines))
 
     # Print summary
-    total_transactions = sum(
-        len(transactions) for transactions in transactions_by_date.values()
-    )
+    total_transactions = len(transactions)
     print(f"Generated ledger file: {output_file_path}")
     date_range_str = (
         f"{start_date} to {end_date}"
         if end_date
-        else f"{start_date} to {max(transactions_by_date.keys())}"
+        else f"{start_date} to {_by_date(transactions[-1])}"
     )
     print(f"Processed {total_transactions} transactions from {date_range_str}")
 
 
-def get_default_output_path(input_path, output_format):
-    """Generate default output path based on input file and format"""
-    input_path = Path(input_path)
-    base_name = input_path.with_suffix("")
-    return f"{base_name}.{output_format}"
-
-
 def ledgerfy_main(args):
     """
     Main function for ledgerfy subcommand
@@ -294,48 +901,13 @@ def ledgerfy_main(args):
             args.start_date,
             args.end_date,
             args.config,
+            workers=args.jobs or os.cpu_count() or 1,
         )
+    except InputError as e:
+        print(f"Input error: {e}")
+        return 1
     except ValueError as e:
         print(f"Configuration error: {e}")
         return 1
 
     return 0
-
-
-if __name__ == "__main__":
-    # For standalone execution
-    import argparse
-
-    parser = argparse.ArgumentParser(
-        description="Convert M-Pesa CSV to Ledger format with balance."
-    )
-    parser.add_argument(
-        "csv_file_path", type=str, help="Path to the input M-Pesa CSV file."
-    )
-    parser.add_argument(
-        "--config",
-        type=str,
-        default=Path(user_data_dir("mpesa-tools")) / "mpesa_rules.json",
-        help="Path to the configuration file (JSON). Defaults to mpesa_rules.json",
-    )
-    parser.add_argument(
-        "--output_file_path",
-        type=str,
-        help="Path to the output Ledger file. Defaults to mpesa_ledger_with_balance.dat",
-    )
-    parser.add_argument(
-        "-s",
-        "--start-date",
-        type=str,
-        default=str(datetime.now().year) + "-01-01",
-        help="Start date for processing transactions (YYYY-MM-DD). Defaults to 2025-01-01",
-    )
-    parser.add_argument(
-        "-e",
-        "--end-date",
-        type=str,
-        help="End date for processing transactions (YYYY-MM-DD)",
-    )
-
-    args = parser.parse_args()
-    sys.exit(ledgerfy_main(args))
@@ -5,73 +5,130 @@ PDF extraction module for mpesa-tools
 
 import csv
 import json
+import multiprocessing
 import os
 import pdfplumber
 import re
-import sys
-from pathlib import Path
-
-
-def extract_mpesa_data_from_pdf(pdf_path):
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    import orjson
+except ImportError:  # no cov
+    orjson = None  # type: ignore[assignment]
+
+from .utils import get_default_output_path
+
+# Anything that cannot be part of a number, removed from amounts
+_AMT_RE = re.compile(r"[^\d.-]")
+
+# Words marking table header rows (matched lowercased) and page footers
+_HEADER_WORDS = (
+    "receipt",
+    "completion",
+    "details",
+    "transaction",
+    "paid",
+    "withdrawn",
+    "balance",
+)
+_FOOTER_WORDS = ("Disclaimer", "Verification", "For self-help", "Page")
+
+# Statements with at least this many pages are read by a pool of worker
+# processes, each taking this many pages at a time
+_PARALLEL_MIN_PAGES = 16
+_PAGES_PER_TASK = 8
+
+# Column headers of the CSV and JSON output, as in the original statement
+_OUTPUT_COLUMNS = [
+    "Receipt No",
+    "Completion Time",
+    "Details",
+    "Transaction Status",
+    "Paid In",
+    "Withdrawn",
+    "Balance",
+]
+
+
+def extract_mpesa_data_from_pdf(pdf_path, workers=1):
     """
     Extract M-PESA transaction data from PDF statement
+
+    With workers > 1, long statements are read a range of pages at a time
+    by that many worker processes. Callers doing so from a script must
+    guard their entry point with if __name__ == "__main__".
     """
-    transactions = []
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        if workers <= 1 or page_count < _PARALLEL_MIN_PAGES:
+            return process_transaction_rows(_table_rows(pdf.pages))
+
+    page_ranges = [
+        range(start, min(start + _PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, _PAGES_PER_TASK)
+    ]
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        rows = [
+            row
+            for page_rows in executor.map(
+                partial(_extract_page_rows, pdf_path), page_ranges
+            )
+            for row in page_rows
+        ]
+
+    return process_transaction_rows(rows)
 
+
+def _extract_page_rows(pdf_path, page_indices):
+    """Raw transaction rows from the given pages, run in worker processes"""
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            # Extract text from page
-            text = page.extract_text()
-
-            # Skip pages that don't contain transaction data
-            if not text or "Receipt No." not in text:
-                continue
-
-            # Extract tables from the page
-            tables = page.extract_tables()
-
-            for table in tables:
-                for row in table:
-                    # Skip empty rows and header rows
-                    if not row or len(row) < 6:
-                        continue
-
-                    # Skip rows that are clearly headers or separators
-                    if any(
-                        header in str(cell).lower()
-                        for cell in row
-                        if cell
-                        for header in [
-                            "receipt",
-                            "completion",
-                            "details",
-                            "transaction",
-                            "paid",
-                            "withdrawn",
-                            "balance",
-                        ]
-                    ):
-                        continue
-
-                    # Skip disclaimer and footer content
-                    if any(
-                        footer in str(cell)
-                        for cell in row
-                        if cell
-                        for footer in [
-                            "Disclaimer",
-                            "Verification",
-                            "For self-help",
-                            "Page",
-                        ]
-                    ):
-                        continue
-
-                    # Process the transaction row
-                    transaction = process_transaction_row(row)
-                    if transaction:
-                        transactions.append(transaction)
+        return _table_rows(pdf.pages[index] for index in page_indices)
+
+
+def _table_rows(pages):
+    """
+    Collect the seven-column transaction rows from the tables on the pages,
+    skipping header, separator and footer rows
+    """
+    rows = []
+
+    for page in pages:
+        # Pages without transaction data have no seven-column tables, and
+        # the row filters below drop the header rows of those that do
+        for table in page.extract_tables():
+            for row in table:
+                # Skip empty rows and rows without all seven columns
+                if not row or len(row) < 7:
+                    continue
+
+                # No keyword contains a newline, so searching the joined
+                # cells matches the same rows as searching each cell
+                row_text = "\n".join(str(cell) for cell in row if cell)
+
+                # Skip rows that are clearly headers or separators
+                lowered = row_text.lower()
+                if any(header in lowered for header in _HEADER_WORDS):
+                    continue
+
+                # Skip disclaimer and footer content
+                if any(footer in row_text for footer in _FOOTER_WORDS):
+                    continue
+
+                rows.append(row[:7])
+
+    return rows
 
+
+def process_transaction_rows(rows):
+    """Clean extracted table rows and convert them to transactions"""
+    transactions = []
+    for row in rows:
+        transaction = process_transaction_row(row)
+        if transaction:
+            transactions.append(transaction)
     return transactions
 
 
@@ -130,12 +187,8 @@ def clean_text(text):
     if not text:
         return ""
 
-    # Remove extra whitespace and special characters
-    text = str(text).strip()
-    text = re.sub(r"\s+", " ", text)  # Replace multiple spaces with single space
-    text = text.replace("\n", " ")  # Replace newlines with spaces
-
-    return text
+    # Collapse runs of whitespace, newlines included, to single spaces
+    return " ".join(str(text).split())
 
 
 def clean_amount_to_number(amount_str):
@@ -145,8 +198,14 @@ def clean_amount_to_number(amount_str):
 
     amount_str = str(amount_str).strip()
 
+    # Fast path for plain amounts such as "1,234.56" or "-50.00"
+    number = amount_str.replace(",", "")
+    digits = number[1:] if number.startswith("-") else number
+    if digits.replace(".", "", 1).isdecimal():
+        return float(number)
+
     # Remove currency symbols, commas, and extra characters
-    amount_str = re.sub(r"[^\d.-]", "", amount_str)
+    amount_str = _AMT_RE.sub("", amount_str)
 
     # Handle empty result after cleaning
     if not amount_str or amount_str == "-" or amount_str == ".":
@@ -165,6 +224,22 @@ def clean_amount_to_number(amount_str):
         return None
 
 
+def _output_row(transaction):
+    """Transaction values in output column order, amounts as strings"""
+    paid_in = transaction["paidIn"]
+    withdrawn = transaction["withdrawn"]
+    balance = transaction["balance"]
+    return (
+        transaction["receiptNo"],
+        transaction["completionTime"],
+        transaction["details"],
+        transaction["transactionStatus"],
+        "" if paid_in is None else str(paid_in),
+        "" if withdrawn is None else str(withdrawn),
+        "" if balance is None else str(balance),
+    )
+
+
 def save_to_csv(transactions, output_path):
     """Save transactions to CSV file with the original header format"""
     if not transactions:
@@ -172,41 +247,10 @@ def save_to_csv(transactions, output_path):
         return False
 
     try:
-        # Convert to CSV format with proper headers and string values
-        csv_transactions = []
-        for transaction in transactions:
-            csv_transaction = {
-                "Receipt No": transaction["receiptNo"],
-                "Completion Time": transaction["completionTime"],
-                "Details": transaction["details"],
-                "Transaction Status": transaction["transactionStatus"],
-                "Paid In": str(transaction["paidIn"])
-                if transaction["paidIn"] is not None
-                else "",
-                "Withdrawn": str(transaction["withdrawn"])
-                if transaction["withdrawn"] is not None
-                else "",
-                "Balance": str(transaction["balance"])
-                if transaction["balance"] is not None
-                else "",
-            }
-            csv_transactions.append(csv_transaction)
-
         with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-            fieldnames = [
-                "Receipt No",
-                "Completion Time",
-                "Details",
-                "Transaction Status",
-                "Paid In",
-                "Withdrawn",
-                "Balance",
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for transaction in csv_transactions:
-                writer.writerow(transaction)
+            writer = csv.writer(csvfile)
+            writer.writerow(_OUTPUT_COLUMNS)
+            writer.writerows(map(_output_row, transactions))
 
         print(
             f"Successfully converted {len(transactions)} transactions to {output_path}"
@@ -224,33 +268,24 @@ def save_to_json(transactions, output_path):
         print("No transactions to save")
         return False
 
-    json_transactions = []
-    for transaction in transactions:
-        json_transaction = {
-            "Receipt No": transaction["receiptNo"],
-            "Completion Time": transaction["completionTime"],
-            "Details": transaction["details"],
-            "Transaction Status": transaction["transactionStatus"],
-            "Paid In": str(transaction["paidIn"])
-            if transaction["paidIn"] is not None
-            else "",
-            "Withdrawn": str(transaction["withdrawn"])
-            if transaction["withdrawn"] is not None
-            else "",
-            "Balance": str(transaction["balance"])
-            if transaction["balance"] is not None
-            else "",
-        }
-        json_transactions.append(json_transaction)
+    json_transactions = [
+        dict(zip(_OUTPUT_COLUMNS, _output_row(transaction)))
+        for transaction in transactions
+    ]
     try:
         with open(output_path, "w", encoding="utf-8") as jsonfile:
-            json.dump(
-                json_transactions,
-                jsonfile,
-                indent=2,
-                ensure_ascii=False,
-                default=json_serializer,
-            )
+            if orjson is not None:
+                jsonfile.write(
+                    orjson.dumps(json_transactions, option=orjson.OPT_INDENT_2).decode()
+                )
+            else:
+                json.dump(
+                    json_transactions,
+                    jsonfile,
+                    indent=2,
+                    ensure_ascii=False,
+                    default=json_serializer,
+                )
 
         print(
             f"Successfully converted {len(transactions)} transactions to {output_path}"
@@ -269,15 +304,8 @@ def json_serializer(obj):
     raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
-def get_default_output_path(input_path, output_format):
-    """Generate default output path based on input file and format"""
-    input_path = Path(input_path)
-    base_name = input_path.with_suffix("")
-    return f"{base_name}.{output_format}"
-
-
 def convert_mpesa_pdf(
-    pdf_path, output_format="csv", output_path=None, show_summary=False
+    pdf_path, output_format="csv", output_path=None, show_summary=False, workers=1
 ):
     """
     Main function to convert M-PESA PDF statement to CSV or JSON
@@ -286,6 +314,7 @@ def convert_mpesa_pdf(
         pdf_path (str): Path to input PDF file
         output_format (str): Output format - 'csv' or 'json'
         output_path (str): Optional output file path
+        workers (int): Worker processes for reading long statements
 
     Returns:
         bool: True if conversion successful, False otherwise
@@ -301,7 +330,7 @@ def convert_mpesa_pdf(
     print(f"Converting {pdf_path} to {output_path}...")
 
     # Extract data from PDF
-    transactions = extract_mpesa_data_from_pdf(pdf_path)
+    transactions = extract_mpesa_data_from_pdf(pdf_path, workers=workers)
 
     if not transactions:
         print("No transactions found in PDF")
@@ -344,22 +373,7 @@ def xtract_main(args):
         output_format=args.format,
         output_path=args.output,
         show_summary=args.summary,
+        workers=args.jobs or os.cpu_count() or 1,
     )
 
     return 0 if success else 1
-
-
-if __name__ == "__main__":
-    # For standalone execution
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Extract M-Pesa transactions from PDF")
-    parser.add_argument("input_pdf", help="Path to the M-PESA PDF statement file")
-    parser.add_argument(
-        "-f", "--format", choices=["csv", "json"], default="csv", help="Output format"
-    )
-    parser.add_argument("-o", "--output", help="Output file path")
-    parser.add_argument("-s", "--summary", action="store_true", help="Show summary")
-
-    args = parser.parse_args()
-    sys.exit(xtract_main(args))
@@ -0,0 +1,380 @@
+# SPDX-FileCopyrightText: 2025-present jonnieey <johnjahi55@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+import json
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+from mpesatools import ledgerfy
+
+AMOUNTS = [-1000.0, -5.0, 0.0, 5.0, 49.99, 50.0, 50.01, 100.0, 1000.0, 7000.0]
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        "amount > 50",
+        "amount >= 50",
+        "amount < 50",
+        "amount <= 50",
+        "amount == 50",
+        "amount != 50",
+        "50 < amount",
+        "50 >= amount",
+        "amount > -5",
+        "-5 == amount",
+        "amount <= 1e3",
+        "1_000 > amount",
+    ],
+)
+def test_compile_condition_specializes_literal_comparisons(condition):
+    compiled = ledgerfy._compile_condition(condition, "<test>")
+
+    assert isinstance(compiled, partial)
+    for amount in AMOUNTS:
+        assert compiled(amount) == eval(condition, {"amount": amount})
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        "amount > 1000 and amount < 7000",
+        "50 < amount < 1000",
+        "abs(amount) >= 5",
+        "round(amount) == 50",
+        "max(amount, 10) > 10",
+        "amount > 10 * 5",
+        "amount == True",
+        "amount > amount",
+    ],
+)
+def test_compile_condition_falls_back_to_eval(condition):
+    compiled = ledgerfy._compile_condition(condition, "<test>")
+
+    assert not isinstance(compiled, partial)
+    for amount in AMOUNTS:
+        assert compiled(amount) == eval(condition, {"amount": amount})
+
+
+def test_compile_condition_rejects_invalid_syntax():
+    with pytest.raises(SyntaxError):
+        ledgerfy._compile_condition("amount >", "<test>")
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        "int(amount) >= 100",
+        "__import__('os')",
+        "balance > 5",
+        "amount.__class__.__base__.__subclasses__()[-1].__init__.__globals__"
+        " is not None and amount > 5",
+        "amount.real > 5",
+        "(amount, 1)[0] > 5",
+        "(lambda: amount)() > 5",
+        "max(x for x in (amount, 1)) > 5",
+        "(x := amount) > 5",
+    ],
+)
+def test_compile_condition_rejects_unknown_names(condition):
+    with pytest.raises(ValueError, match="conditions may only use"):
+        ledgerfy._compile_condition(condition, "<test>")
+
+
+MATCHER_RULES = {
+    "rules": [
+        {"keywords": ["pay", "paybill", "bill"], "exclude": ["charge"]},
+        {"keywords": ["café", "ünicode"]},
+        {"keywords": ["airtime"], "exclude": [""]},
+        {"keywords": ["a"]},
+    ]
+}
+
+MATCHER_DETAILS = [
+    "",
+    "paybill online to kplc",
+    "pay bill charge",
+    "airtime purchase",
+    "café java ünicode",
+    "customer transfer to jane",
+    "aaaa",
+]
+
+
+def _plain_matcher(monkeypatch, config):
+    monkeypatch.setattr(ledgerfy, "ahocorasick", None)
+    monkeypatch.setattr(ledgerfy, "hyperscan", None)
+    return ledgerfy.build_rule_matcher(config)
+
+
+def test_plain_matcher_finds_substring_terms(monkeypatch):
+    match = _plain_matcher(monkeypatch, MATCHER_RULES)
+
+    assert match("pay bill charge") == {"", "pay", "bill", "charge", "a"}
+    assert match("") == {""}
+
+
+@pytest.mark.parametrize("backend", ["ahocorasick", "hyperscan"])
+def test_matcher_backends_agree_with_plain_scan(monkeypatch, backend):
+    if getattr(ledgerfy, backend) is None:
+        pytest.skip(f"{backend} is not installed")
+
+    with monkeypatch.context() as patch:
+        plain = _plain_matcher(patch, MATCHER_RULES)
+        expected = [plain(details) for details in MATCHER_DETAILS]
+
+    other = "hyperscan" if backend == "ahocorasick" else "ahocorasick"
+    monkeypatch.setattr(ledgerfy, other, None)
+    match = ledgerfy.build_rule_matcher(MATCHER_RULES)
+
+    assert [match(details) for details in MATCHER_DETAILS] == expected
+
+
+def test_matcher_with_only_the_empty_keyword(monkeypatch):
+    config = {"rules": [{"keywords": [""]}]}
+
+    assert ledgerfy.build_rule_matcher(config)("anything") == {""}
+    assert _plain_matcher(monkeypatch, config)("") == {""}
+
+
+LEDGER_RULES = {
+    "accounts": ["Expenses:Airtime", "Expenses:Bills", "Income", "Expenses:Others"],
+    "rules": [
+        {"keywords": ["airtime"], "account": "Expenses:Airtime"},
+        {
+            "keywords": ["pay bill", "kplc"],
+            "match_type": "all",
+            "condition": "amount > 100",
+            "account": "Expenses:Bills",
+        },
+        {"keywords": ["received"], "account": "Income"},
+    ],
+    "default_account": "Expenses:Others",
+}
+
+DETAILS = [
+    "Airtime Purchase",
+    "Pay Bill Online to KPLC",
+    "Funds received from JOHN DOE",
+    '"Merchant Payment, Naivas"',
+    "Café Java",
+]
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(LEDGER_RULES))
+    return path
+
+
+@pytest.fixture
+def config(config_path):
+    return ledgerfy.load_config(config_path)
+
+
+@pytest.fixture
+def statement(tmp_path):
+    lines = [
+        "\ufeffReceipt No,Completion Time,Details,Transaction Status,"
+        "Paid In,Withdrawn,Balance"
+    ]
+    for i in range(300):
+        details = DETAILS[i % len(DETAILS)]
+        status = ["Completed", "completed", "Failed", "COMPLETED"][i % 4]
+        amount = f"{(i * 37) % 5000 + 0.5:.2f}"
+        paid_in, withdrawn = (amount, "") if "received" in details else ("", amount)
+        lines.append(
+            f"R{i:04d},2025-{1 + i // 100:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00,"
+            f"{details},{status},{paid_in},{withdrawn},{10000 + i * 0.25}"
+        )
+    path = tmp_path / "statement.csv"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("end_date", [None, "2025-02-15"])
+def test_csv_readers_agree(config, statement, end_date):
+    expected = ledgerfy._categorize_rows(
+        ledgerfy._iter_csv_rows(statement), "2025-01-10", end_date, config
+    )
+
+    transactions = ledgerfy._categorize(
+        ledgerfy._read_csv_fast(statement, "2025-01-10", end_date), config
+    )
+
+    assert expected
+    assert transactions == expected
+
+
+@pytest.mark.parametrize("ending", ["", "\n", "\r\n\r\n"])
+def test_header_only_csv_has_no_transactions(
+    monkeypatch, capsys, tmp_path, config_path, ending
+):
+    statement = tmp_path / "statement.csv"
+    statement.write_text(
+        "Receipt No,Completion Time,Details,Transaction Status,"
+        "Paid In,Withdrawn,Balance" + ending,
+        encoding="utf-8",
+    )
+
+    assert list(ledgerfy._iter_csv_rows(statement)) == []
+    assert ledgerfy._read_csv_fast(statement, "2025-01-01", None).empty
+
+    monkeypatch.setattr(ledgerfy, "_PANDAS_MIN_BYTES", 0)
+    ledgerfy.parse_mpesa_to_ledger_with_balance(
+        statement, tmp_path / "out.dat", "2025-01-01", None, config_path
+    )
+    assert "No transactions found" in capsys.readouterr().out
+    assert not (tmp_path / "out.dat").exists()
+
+
+@pytest.mark.parametrize(
+    "name, content, message",
+    [
+        ("statement.json", "", "No transactions found"),
+        ("statement.json", "\ufeff \n", "No transactions found"),
+        ("statement.json", "[{", "Input error: "),
+        ("statement.json", '{"Details": "x"}', "Input error: "),
+        ("statement.csv", "Receipt No,Details\nR1,x\n", "Input error: Input file"),
+    ],
+)
+def test_ledgerfy_main_reports_input_problems(
+    capsys, tmp_path, config_path, name, content, message
+):
+    input_file = tmp_path / name
+    input_file.write_text(content, encoding="utf-8")
+    args = SimpleNamespace(
+        input_file=input_file,
+        output=tmp_path / "out.dat",
+        start_date="2025-01-01",
+        end_date=None,
+        config=config_path,
+        jobs=1,
+    )
+
+    status = ledgerfy.ledgerfy_main(args)
+
+    assert message in capsys.readouterr().out
+    assert status == (1 if message.startswith("Input error") else 0)
+
+
+@pytest.mark.parametrize("end_date", [None, "2025-02-15"])
+def test_parallel_csv_iter_matches_serial_read(config, statement, end_date):
+    expected = ledgerfy._categorize(
+        ledgerfy._read_csv_fast(statement, "2025-01-10", end_date), config
+    )
+
+    transactions = list(
+        ledgerfy._parallel_csv_iter(
+            statement, config, "2025-01-10", end_date, workers=2, chunk_bytes=512
+        )
+    )
+
+    assert transactions
+    assert transactions == expected
+
+
+def ledger_line(account, posting, details, balance=None):
+    suffix = f" BAL KES {balance}" if balance else ""
+    return f"    {account:<45} {posting:>15} KES ; {details}{suffix}\n"
+
+
+LEDGER_STATEMENT = """\
+Receipt No,Completion Time,Details,Transaction Status,Paid In,Withdrawn,Balance
+R1,2025-01-02 09:00:00,Airtime Purchase,Completed,,50.00,950.00
+R2,2025-01-01 18:30:00,Funds received from JOHN DOE,Completed,1000.00,,1000.00
+R3,2025-01-02 09:00:00,Pay Bill Online to KPLC,Completed,,150.00,800.00
+R4,2025-01-02 12:00:00,Pay Bill Online to KPLC,completed,,80.00,720.00
+R5,2025-01-02 13:00:00,Customer Transfer,Failed,,10.00,710.00
+R6,2025-01-03 08:00:00,Reversal,Completed,,-0.00,720.00
+R7,2025-01-03 08:00:00,Fee,Completed,,0,720.00
+R8,2024-12-31 23:59:59,Airtime Purchase,Completed,,5.00,1055.00
+"""
+
+# Days in date order, same-time transactions in input order and the
+# balance on the last transaction of each day
+LEDGER_OUTPUT = (
+    "2025-01-01 *\n"
+    "    Assets:Checking:Mpesa\n"
+    + ledger_line("Income", "-1000.00", "Funds received from JOHN DOE", "1000.00")
+    + "\n"
+    "2025-01-02 *\n"
+    "    Assets:Checking:Mpesa\n"
+    + ledger_line("Expenses:Airtime", "50.00", "Airtime Purchase")
+    + ledger_line("Expenses:Bills", "150.00", "Pay Bill Online to KPLC")
+    + ledger_line("Expenses:Others", "80.00", "Pay Bill Online to KPLC", "720.00")
+    + "\n"
+    "2025-01-03 *\n"
+    "    Assets:Checking:Mpesa\n"
+    + ledger_line("Expenses:Others", "-0.00", "Reversal")
+    + ledger_line("Expenses:Others", "0.00", "Fee", "720.00")
+    + "\n"
+)
+
+
+@pytest.mark.parametrize("pandas_min_bytes", [0, ledgerfy._PANDAS_MIN_BYTES])
+def test_ledger_output(monkeypatch, capsys, tmp_path, config_path, pandas_min_bytes):
+    statement = tmp_path / "statement.csv"
+    statement.write_text(LEDGER_STATEMENT, encoding="utf-8")
+    output = tmp_path / "out.dat"
+    monkeypatch.setattr(ledgerfy, "_PANDAS_MIN_BYTES", pandas_min_bytes)
+
+    ledgerfy.parse_mpesa_to_ledger_with_balance(
+        statement, output, "2025-01-01", None, config_path
+    )
+
+    assert output.read_text(encoding="utf-8") == LEDGER_OUTPUT
+    assert capsys.readouterr().out.splitlines()[-2:] == [
+        f"Generated ledger file: {output}",
+        "Processed 6 transactions from 2025-01-01 to 2025-01-03",
+    ]
+
+
+def test_ledger_output_groups_days(capsys, tmp_path, config_path, statement):
+    output = tmp_path / "out.dat"
+
+    ledgerfy.parse_mpesa_to_ledger_with_balance(
+        statement, output, "2025-01-10", "2025-02-15", config_path
+    )
+
+    days = output.read_text(encoding="utf-8").split("\n\n")
+    assert days.pop() == ""
+    dates = []
+    postings = 0
+    for day in days:
+        header, account, *lines = day.split("\n")
+        assert header.endswith(" *")
+        dates.append(header[:-2])
+        assert account == "    Assets:Checking:Mpesa"
+        *head, last = lines
+        assert " BAL KES " in last
+        assert not any(" BAL KES " in line for line in head)
+        postings += len(lines)
+
+    assert dates == sorted(set(dates))
+    assert dates[0] >= "2025-01-10" and dates[-1] <= "2025-02-15"
+    assert capsys.readouterr().out.splitlines()[-1] == (
+        f"Processed {postings} transactions from 2025-01-10 to 2025-02-15"
+    )
+
+
+@pytest.mark.parametrize(
+    "name, content, expected",
+    [
+        ("statement.json", "Receipt No,Details\n", True),
+        ("statement.CSV", "[]", False),
+        ("statement", "[{}]", True),
+        ("statement.txt", "{}", True),
+        ("statement", "\ufeff" + " " * 100 + "\n[", True),
+        ("statement", "Receipt No,Details\n", False),
+        ("statement", "", False),
+    ],
+)
+def test_is_json_file(tmp_path, name, content, expected):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+
+    assert ledgerfy._is_json_file(path) is expected
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2025-present jonnieey <johnjahi55@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+import math
+import random
+
+from mpesatools.xtract import (
+    clean_amount_to_number,
+    clean_text,
+    process_transaction_rows,
+)
+
+TEXT_CELLS = [
+    None,
+    "",
+    " ",
+    "QWE12 ",
+    " Pay\nBill  to X",
+    "Completed",
+    "x\ty",
+    "\u3000a\x1cb\xa0",
+]
+
+AMOUNT_CELLS = [
+    None,
+    "",
+    "1,234.56",
+    "-50.00",
+    " 12 ",
+    "1 234",
+    "1.2.3",
+    "-",
+    ".",
+    ".5",
+    "KSh 1,000",
+    "1e5",
+    "inf",
+    "12-3",
+    "١٢",
+    "-0.00",
+]
+
+
+def process_row(row):
+    """Per-row reference for process_transaction_rows"""
+    receipt_no, completion_time, details, status = map(clean_text, row[:4])
+    if not receipt_no or not completion_time:
+        return None
+
+    paid_in, withdrawn, balance = (
+        clean_amount_to_number(clean_text(cell)) for cell in row[4:7]
+    )
+    if withdrawn is not None and withdrawn < 0:
+        withdrawn = abs(withdrawn)
+
+    return {
+        "receiptNo": receipt_no,
+        "completionTime": completion_time,
+        "details": details,
+        "transactionStatus": status or "Completed",
+        "paidIn": paid_in,
+        "withdrawn": withdrawn,
+        "balance": balance,
+    }
+
+
+def same_value(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return math.copysign(1.0, a) == math.copysign(1.0, b) and (
+            a == b or (math.isnan(a) and math.isnan(b))
+        )
+    return type(a) is type(b) and a == b
+
+
+def test_process_transaction_rows_matches_per_row_cleaning():
+    rng = random.Random(2)
+    rows = [
+        [rng.choice(TEXT_CELLS) for _ in range(4)]
+        + [rng.choice(AMOUNT_CELLS) for _ in range(3)]
+        for _ in range(2000)
+    ]
+    rows += [[cell, "2025-01-01 10:00:00"] + [cell] * 5 for cell in TEXT_CELLS]
+    rows += [["R1", "2025-01-01", "x", ""] + [cell] * 3 for cell in AMOUNT_CELLS]
+
+    expected = [t for t in map(process_row, rows) if t]
+    transactions = process_transaction_rows(rows)
+
+    assert len(transactions) == len(expected)
+    for transaction, reference in zip(transactions, expected):
+        assert list(transaction) == list(reference)
+        for key, value in reference.items():
+            assert same_value(transaction[key], value), (key, transaction, reference)
+
+
+def test_process_transaction_rows_empty():
+    assert process_transaction_rows([]) == []
+    assert process_transaction_rows([[None] * 7]) == []